@@ -14,9 +14,13 @@ import sys
 import os
 import signal
 import json
-import subprocess
+import codecs
+import atexit
+import mmap
+import time
+import shlex
+from array import array
 from collections import deque
-from datetime import datetime
 
 from PyQt5.QtCore import (
     Qt,
@@ -27,6 +31,9 @@ from PyQt5.QtCore import (
     QProcess,
     pyqtSignal,
     QUrl,
+    QFile,
+    QIODevice,
+    QFileSystemWatcher,
 )
 from PyQt5.QtGui import (
     QFont,
@@ -54,13 +61,15 @@ from PyQt5.QtWidgets import (
     QShortcut,
 )
 
-# Try import WebEngine; if not available, show fallback
+# QtWebEngine is imported on first use (see _web_engine_view); None means
+# not tried yet, False means unavailable
+_QWebEngineView = None
+
+# Prefer orjson (C implementation) for config I/O; stdlib json otherwise
 try:
-    from PyQt5.QtWebEngineWidgets import QWebEngineView
-    WEB_AVAILABLE = True
-except Exception:
-    QWebEngineView = None
-    WEB_AVAILABLE = False
+    import orjson
+except ImportError:
+    orjson = None
 
 # -------------------------
 # Constants & config paths
@@ -76,39 +85,144 @@ LOG_FILE = os.path.join(CONFIG_DIR, "pyshell.log")
 
 os.makedirs(CONFIG_DIR, exist_ok=True)
 
+# Application-wide stylesheet. Widgets only set an object name and are styled
+# from here, so Qt parses the rules once instead of per widget.
+GLOBAL_QSS = """
+QFrame#internalWin, QFrame#internalWin * {
+    background: #1b1b1b;
+    color: white;
+    border-radius: 6px;
+}
+QWidget#titlebar, QWidget#titlebar * {
+    background: rgba(0,0,0,0.18);
+}
+QLabel#titlebarTitle {
+    font-weight: bold;
+}
+QPushButton#titlebarBtn {
+    background: transparent;
+    border: none;
+    color: white;
+    font-weight: bold;
+}
+QPlainTextEdit#termOutput, QPlainTextEdit#termOutput * {
+    background: #0d0f12;
+    color: #e6e6e6;
+    border-radius: 6px;
+    padding: 6px;
+}
+QLineEdit#termInput {
+    background: #0b0b0b;
+    color: #a8ff60;
+    padding: 6px;
+    border-radius: 6px;
+}
+QWidget#notifSlot, QWidget#notifSlot * {
+    background: rgba(30,30,30,0.9);
+    color: white;
+    border-radius: 8px;
+    padding: 8px;
+}
+QPushButton#dockIcon {
+    border-radius: 8px;
+    background: rgba(255,255,255,0.04);
+}
+"""
+
 # -------------------------
 # Utilities
 # -------------------------
 def load_json(path, default=None):
     try:
+        if orjson is not None:
+            # map the file and parse straight from the mapping
+            with open(path, "rb") as f, \
+                    mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, \
+                    memoryview(mm) as mv:
+                return orjson.loads(mv)
         with open(path, "r", encoding="utf-8") as f:
             return json.load(f)
     except Exception:
         return default
 
-def save_json(path, obj):
+def save_json(path, obj, durable=False):
+    # serialize fully, write to a temp file with raw fd writes, then rename
+    # over the target so a crash never leaves a half-written config
     try:
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(obj, f, indent=2, ensure_ascii=False)
-            return True
+        if orjson is not None:
+            data = orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+        else:
+            data = json.dumps(obj, indent=2, ensure_ascii=False).encode("utf-8")
+    except Exception as e:
+        print("Failed to save json:", e)
+        return False
+    tmp = path + ".tmp"
+    try:
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        try:
+            view = memoryview(data)
+            while view:
+                view = view[os.write(fd, view):]
+            if durable:
+                os.fsync(fd)
+        finally:
+            os.close(fd)
+        os.replace(tmp, path)
+        return True
     except Exception as e:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
         print("Failed to save json:", e)
         return False
 
 class Logger:
     def __init__(self, path=LOG_FILE):
         self.path = path
+        # keep one O_APPEND fd open and batch lines in memory; flush() hands
+        # the whole batch to the kernel in a single write
+        self._buf = deque()
+        try:
+            self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        except Exception:
+            self._fd = None
+        # timestamp prefix is reformatted only when the second changes
+        self._last_sec = 0
+        self._last_str = ""
 
     def _write(self, level, *parts):
         s = " ".join(str(p) for p in parts)
-        t = datetime.now().isoformat()
-        line = f"[{t}] {level}: {s}\n"
+        now = time.time()
+        sec = int(now)
+        if sec != self._last_sec:
+            self._last_str = time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(sec))
+            self._last_sec = sec
+        ms = int((now - sec) * 1000)
+        line = f"[{self._last_str}.{ms:03d}] {level}: {s}\n"
+        self._buf.append(line)
+
+    def flush(self):
+        if not self._buf or self._fd is None:
+            return
+        data = "".join(self._buf).encode("utf-8")
+        self._buf.clear()
         try:
-            with open(self.path, "a", encoding="utf-8") as f:
-                f.write(line)
+            while data:
+                n = os.write(self._fd, data)
+                data = data[n:]
         except Exception:
             pass
 
+    def close(self):
+        self.flush()
+        try:
+            if self._fd is not None:
+                os.close(self._fd)
+        except Exception:
+            pass
+        self._fd = None
+
     def info(self, *parts):
         self._write("INFO", *parts)
 
@@ -119,6 +233,7 @@ class Logger:
         self._write("ERR", *parts)
 
 logger = Logger()
+atexit.register(logger.close)
 
 # -------------------------
 # Theme manager
@@ -142,21 +257,42 @@ class ThemeManager:
             },
         }
         self.current = "dark"
+        self._build_styles()
 
     def get(self, key):
-        return self.themes[self.current].get(key, "#000000")
+        return self._cur.get(key, "#000000")
 
     def set_theme(self, name):
         if name in self.themes:
             self.current = name
+            self._build_styles()
             logger.info("Theme set to", name)
             return True
         return False
 
+    def _build_styles(self):
+        # themed rules are composed once per theme change
+        self._cur = self.themes[self.current]
+        self.panel_css = (
+            "QWidget#topPanel, QWidget#topPanel * {"
+            f" background: {self.get('panel_bg')}; color: {self.get('panel_fg')};"
+            " border-bottom: 1px solid rgba(0,0,0,0.2); }\n"
+        )
+        self.dock_css = (
+            "QWidget#dock, QWidget#dock * {"
+            f" background: {self.get('dock_bg')}; color: white; }}\n"
+        )
+        # themed rules first so the fixed GLOBAL_QSS rules win on ties
+        self.stylesheet = self.panel_css + self.dock_css + GLOBAL_QSS
+
 # -------------------------
 # Notification center
 # -------------------------
 class NotificationCenter(QWidget):
+    # notifications are shown in a fixed pool of slots reused round-robin;
+    # the oldest visible one is overwritten when the pool is full
+    SLOT_COUNT = 8
+
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setWindowFlags(Qt.FramelessWindowHint | Qt.WindowStaysOnTopHint)
@@ -166,30 +302,66 @@ class NotificationCenter(QWidget):
         self.vbox.setContentsMargins(8, 8, 8, 8)
         self.vbox.setSpacing(6)
         self.setLayout(self.vbox)
-        self.notifications = deque(maxlen=60)
 
-    def push(self, title, text, timeout=5000):
-        w = QWidget()
-        w.setStyleSheet("background: rgba(30,30,30,0.9); color: white; border-radius: 8px; padding:8px;")
+        self._slots = [self._make_slot() for _ in range(self.SLOT_COUNT)]
+        self.expiry = array("d", [0.0] * self.SLOT_COUNT)  # monotonic deadline, 0 = free
+        self._head = 0
+
+        # one sweep timer hides expired slots; runs only while something is visible
+        self._sweep_timer = QTimer(self)
+        self._sweep_timer.setInterval(250)
+        self._sweep_timer.timeout.connect(self._sweep)
+
+    def _make_slot(self):
+        w = QWidget(self)
+        w.setObjectName("notifSlot")
         v = QVBoxLayout()
         v.setContentsMargins(6,6,6,6)
         w.setLayout(v)
-        t = QLabel(f"<b>{title}</b>")
-        t.setWordWrap(True)
-        s = QLabel(text)
-        s.setWordWrap(True)
-        v.addWidget(t)
-        v.addWidget(s)
+        # plain text + bold font: title/text may contain paths or other
+        # user text, so keep them away from Qt's rich-text parser
+        w.title_lbl = QLabel()
+        w.title_lbl.setTextFormat(Qt.PlainText)
+        f = w.title_lbl.font()
+        f.setBold(True)
+        w.title_lbl.setFont(f)
+        w.title_lbl.setWordWrap(True)
+        w.text_lbl = QLabel()
+        w.text_lbl.setTextFormat(Qt.PlainText)
+        w.text_lbl.setWordWrap(True)
+        v.addWidget(w.title_lbl)
+        v.addWidget(w.text_lbl)
+        w.hide()
         self.vbox.addWidget(w)
-        self.notifications.append((w, datetime.now()))
-        QTimer.singleShot(timeout, lambda: self._remove(w))
+        return w
 
-    def _remove(self, widget):
-        try:
-            self.vbox.removeWidget(widget)
-            widget.setParent(None)
-        except Exception:
-            pass
+    def push(self, title, text, timeout=5000):
+        i = self._head
+        self._head = (i + 1) % self.SLOT_COUNT
+        slot = self._slots[i]
+        self.expiry[i] = time.monotonic() + timeout / 1000.0
+        slot.title_lbl.setText(title)
+        slot.text_lbl.setText(text)
+        # newest notification goes to the bottom
+        self.vbox.removeWidget(slot)
+        self.vbox.addWidget(slot)
+        slot.show()
+        if not self._sweep_timer.isActive():
+            self._sweep_timer.start()
+
+    def _sweep(self):
+        now = time.monotonic()
+        active = False
+        for i, deadline in enumerate(self.expiry):
+            if not deadline:
+                continue
+            if deadline <= now:
+                self.expiry[i] = 0.0
+                self._slots[i].hide()
+            else:
+                active = True
+        if not active:
+            self._sweep_timer.stop()
 
 # -------------------------
 # Internal Window
@@ -202,7 +374,7 @@ class InternalWindow(QFrame):
         super().__init__(parent)
         self.setFrameShape(QFrame.StyledPanel)
         self.setAttribute(Qt.WA_DeleteOnClose, True)
-        self.setStyleSheet("background: #1b1b1b; color: white; border-radius:6px;")
+        self.setObjectName("internalWin")
         self.setFocusPolicy(Qt.ClickFocus)
 
         # state
@@ -242,20 +414,18 @@ class InternalWindow(QFrame):
         self._resize_start = None
         self._resize_initial_geom = None
 
-        # keyboard shortcuts
-        QShortcut(Qt.CTRL + Qt.Key_W, self).activated.connect(self.on_close)
-        QShortcut(Qt.Key_Escape, self).activated.connect(self.on_close)
+        # Ctrl+W / Esc are handled by PyShellApp.close_focused_window
 
     def _init_titlebar(self):
         self.titlebar = QWidget()
         self.titlebar.setFixedHeight(32)
-        self.titlebar.setStyleSheet("background: rgba(0,0,0,0.18);")
+        self.titlebar.setObjectName("titlebar")
         h = QHBoxLayout()
         h.setContentsMargins(8, 0, 8, 0)
         self.titlebar.setLayout(h)
 
         self.lbl_title = QLabel(self.title)
-        self.lbl_title.setStyleSheet("font-weight:bold;")
+        self.lbl_title.setObjectName("titlebarTitle")
         h.addWidget(self.lbl_title)
         h.addStretch()
 
@@ -265,7 +435,7 @@ class InternalWindow(QFrame):
         self.btn_close = QPushButton("✕")
         for b in (self.btn_min, self.btn_max, self.btn_close):
             b.setFixedSize(28, 22)
-            b.setStyleSheet("background: transparent; border: none; color: white; font-weight:bold;")
+            b.setObjectName("titlebarBtn")
         self.btn_min.clicked.connect(self.on_min)
         self.btn_max.clicked.connect(self.on_max)
         self.btn_close.clicked.connect(self.on_close)
@@ -319,7 +489,8 @@ class InternalWindow(QFrame):
         self.hide()
 
     def on_max(self):
-        parent_geom = self.parent().geometry() if self.parent() is not None else QApplication.primaryScreen().geometry()
+        p = self.parent()
+        parent_geom = p.geometry() if p is not None else QApplication.primaryScreen().geometry()
         if not self.is_maximized:
             self.prev_geometry = self.geometry()
             self.setGeometry(10, PANEL_HEIGHT + 10, parent_geom.width() - 20, parent_geom.height() - PANEL_HEIGHT - 20)
@@ -355,6 +526,18 @@ class FancyTerminal(QWidget):
     Not a PTY: some interactive apps (nano, top, etc.) won't behave fully.
     But for typical CLI commands it works fine.
     """
+    _MONO_FONT = None
+
+    @classmethod
+    def _font(cls):
+        # font database lookup is done once and shared by all terminals
+        if cls._MONO_FONT is None:
+            f = QFont("Monospace")
+            f.setStyleHint(QFont.Monospace)
+            f.setPointSize(11)
+            cls._MONO_FONT = f
+        return cls._MONO_FONT
+
     def __init__(self, shell_cmd=None, parent=None):
         super().__init__(parent)
         self.shell_cmd = shell_cmd or ["/bin/bash"]
@@ -365,31 +548,31 @@ class FancyTerminal(QWidget):
         # Output area (QPlainTextEdit is faster and better for plain text)
         self.output = QPlainTextEdit()
         self.output.setReadOnly(True)
-        self.output.setStyleSheet("""
-            background: #0d0f12;
-            color: #e6e6e6;
-            border-radius: 6px;
-            padding: 6px;
-        """)
-        mono = QFont("Monospace")
-        mono.setStyleHint(QFont.Monospace)
-        mono.setPointSize(11)
-        self.output.setFont(mono)
+        # scrollback is bounded and never needs undo history
+        self.output.setUndoRedoEnabled(False)
+        self.output.setMaximumBlockCount(10000)
+        self.output.setCenterOnScroll(False)
+        self.output.setObjectName("termOutput")
+        self.output.setFont(self._font())
         self.vbox.addWidget(self.output)
 
         # Input line
         self.input = QLineEdit()
         self.input.setPlaceholderText("Enter command and press Enter")
         self.input.returnPressed.connect(self.on_send)
-        self.input.setStyleSheet("""
-            background: #0b0b0b;
-            color: #a8ff60;
-            padding: 6px;
-            border-radius: 6px;
-        """)
-        self.input.setFont(mono)
+        self.input.setObjectName("termInput")
+        self.input.setFont(self._font())
         self.vbox.addWidget(self.input)
 
+        # Output is accumulated here and written to the view at most every 50 ms
+        self._pending = bytearray()
+        # stateful decoder: multi-byte sequences split across reads stay intact
+        self._dec = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setSingleShot(True)
+        self._flush_timer.setInterval(50)
+        self._flush_timer.timeout.connect(self._flush)
+
         # Process
         self.proc = QProcess(self)
         self.proc.setProcessChannelMode(QProcess.MergedChannels)
@@ -407,6 +590,11 @@ class FancyTerminal(QWidget):
             logger.error("FancyTerminal start error:", e)
 
     def append_text(self, text):
+        # keep ordering with any buffered process output
+        self._flush()
+        self._insert(text)
+
+    def _insert(self, text):
         # append and auto-scroll
         self.output.moveCursor(QTextCursor.End)
         self.output.insertPlainText(text)
@@ -417,12 +605,23 @@ class FancyTerminal(QWidget):
             raw = self.proc.readAllStandardOutput()
             if raw is None:
                 return
-            data = bytes(raw).decode("utf-8", errors="replace")
-            self.append_text(data)
+            self._pending += bytes(raw)
+            if not self._flush_timer.isActive():
+                self._flush_timer.start()
         except Exception as e:
             logger.warn("FancyTerminal read_output error:", e)
 
+    def _flush(self, final=False):
+        self._flush_timer.stop()
+        if not self._pending and not final:
+            return
+        data = self._dec.decode(self._pending, final)
+        self._pending.clear()
+        if data:
+            self._insert(data)
+
     def on_finished(self, exitCode, exitStatus=None):
+        self._flush(final=True)
         self.append_text(f"\n[Process exited with code {exitCode}]\n")
         logger.info("FancyTerminal process exited", exitCode)
 
@@ -470,16 +669,67 @@ class SimpleEditor(QWidget):
         self.btn_clear.clicked.connect(self.text.clear)
         self.current_path = None
 
+        # incremental load state (see open_file/_load_chunk)
+        self._load_file = None
+        self._load_path = None
+        self._load_dec = None
+
     def open_file(self):
         p, _ = QFileDialog.getOpenFileName(self, "Open file", os.path.expanduser("~"))
         if p:
-            try:
-                with open(p, "r", encoding="utf-8") as f:
-                    data = f.read()
-                self.text.setPlainText(data)
-                self.current_path = p
-            except Exception as e:
-                QMessageBox.critical(self, "Error", str(e))
+            self._stop_loading()
+            f = QFile(p)
+            if not f.open(QIODevice.ReadOnly | QIODevice.Text):
+                QMessageBox.critical(self, "Error", f.errorString())
+                return
+            self._load_file = f
+            self._load_path = p
+            # strict decoder: a non-UTF-8 file is rejected, not silently mangled
+            self._load_dec = codecs.getincrementaldecoder("utf-8")()
+            # stream the file into the document in chunks so large files
+            # don't block the UI or get held twice in memory; editing and
+            # saving stay disabled until the whole file is in
+            self.text.clear()
+            self.text.setUndoRedoEnabled(False)
+            self.text.setReadOnly(True)
+            self.btn_save.setEnabled(False)
+            self.btn_clear.setEnabled(False)
+            QTimer.singleShot(0, self._load_chunk)
+
+    def _load_chunk(self):
+        if self._load_file is None:
+            return
+        try:
+            at_end = self._load_file.atEnd()
+            data = self._load_dec.decode(bytes(self._load_file.read(65536)), at_end)
+            cursor = QTextCursor(self.text.document())
+            cursor.movePosition(QTextCursor.End)
+            cursor.insertText(data)
+        except Exception as e:
+            # the document only holds part of the file; don't let Save
+            # write it over the previously opened path
+            self._stop_loading()
+            self.text.clear()
+            self.current_path = None
+            QMessageBox.critical(self, "Error", str(e))
+            return
+        if at_end:
+            self.current_path = self._load_path
+            self._stop_loading()
+            self.text.moveCursor(QTextCursor.Start)
+        else:
+            QTimer.singleShot(0, self._load_chunk)
+
+    def _stop_loading(self):
+        if self._load_file is not None:
+            self._load_file.close()
+        self._load_file = None
+        self._load_path = None
+        self._load_dec = None
+        self.text.setUndoRedoEnabled(True)
+        self.text.setReadOnly(False)
+        self.btn_save.setEnabled(True)
+        self.btn_clear.setEnabled(True)
 
     def save_file(self):
         if self.current_path is None:
@@ -497,6 +747,17 @@ class SimpleEditor(QWidget):
 # -------------------------
 # MiniBrowser wrapper
 # -------------------------
+def _web_engine_view():
+    global _QWebEngineView
+    if _QWebEngineView is None:
+        try:
+            from PyQt5.QtWebEngineWidgets import QWebEngineView
+            _QWebEngineView = QWebEngineView
+        except Exception as e:
+            logger.warn("QtWebEngine not available:", e)
+            _QWebEngineView = False
+    return _QWebEngineView
+
 class MiniBrowser(QWidget):
     def __init__(self, url="https://www.example.com", parent=None):
         super().__init__(parent)
@@ -505,9 +766,11 @@ class MiniBrowser(QWidget):
         self.address = QLineEdit(url)
         self.address.returnPressed.connect(self.load)
         v.addWidget(self.address)
-        if WEB_AVAILABLE and QWebEngineView is not None:
+        self.view = None
+        view_cls = _web_engine_view()
+        if view_cls:
             try:
-                self.view = QWebEngineView()
+                self.view = view_cls()
                 self.view.load(QUrl.fromUserInput(url))
                 v.addWidget(self.view)
             except Exception as e:
@@ -520,7 +783,7 @@ class MiniBrowser(QWidget):
 
     def load(self):
         url = self.address.text()
-        if WEB_AVAILABLE and QWebEngineView is not None:
+        if self.view is not None:
             try:
                 self.view.load(QUrl.fromUserInput(url))
             except Exception as e:
@@ -535,6 +798,7 @@ class TopPanel(QWidget):
         super().__init__(None)
         self.shell = shell
         self.theme = theme
+        self.setObjectName("topPanel")
         self.setWindowFlags(Qt.FramelessWindowHint | Qt.WindowStaysOnTopHint)
         self.setFixedHeight(PANEL_HEIGHT)
         self.setAttribute(Qt.WA_TranslucentBackground, True)
@@ -579,16 +843,12 @@ class TopPanel(QWidget):
         m.addAction("Exit Shell", lambda: self.shell.quit())
         m.exec_(self.btn_menu.mapToGlobal(self.btn_menu.rect().bottomLeft()))
 
-    def apply_theme(self):
-        bg = self.theme.get("panel_bg")
-        fg = self.theme.get("panel_fg")
-        self.setStyleSheet(f"background: {bg}; color: {fg}; border-bottom: 1px solid rgba(0,0,0,0.2);")
-
 class Dock(QWidget):
     def __init__(self, shell, theme: ThemeManager):
         super().__init__(None)
         self.shell = shell
         self.theme = theme
+        self.setObjectName("dock")
         self.setWindowFlags(Qt.FramelessWindowHint | Qt.WindowStaysOnTopHint)
         self.setFixedWidth(DOCK_WIDTH)
         v = QVBoxLayout()
@@ -606,14 +866,10 @@ class Dock(QWidget):
         btn = QPushButton(text[0])
         btn.setToolTip(text)
         btn.setFixedSize(44,44)
-        btn.setStyleSheet("border-radius:8px; background: rgba(255,255,255,0.04);")
+        btn.setObjectName("dockIcon")
         btn.clicked.connect(cb)
         self.layout().addWidget(btn)
 
-    def apply_theme(self):
-        bg = self.theme.get("dock_bg")
-        self.setStyleSheet(f"background: {bg}; color: white;")
-
 # -------------------------
 # Workspace Manager
 # -------------------------
@@ -637,24 +893,30 @@ class WorkspaceManager(QWidget):
             self.workspaces.append(canvas)
             self.stack.addWidget(w)
         self.current = 0
+        # windows per workspace, kept in sync by add_window/_on_window_closed
+        self._by_workspace = [[] for _ in range(count)]
 
     def add_window(self, window: InternalWindow, workspace=None):
         idx = workspace if workspace is not None else self.current
         ws = self.workspaces[idx]
         ws.layout().addWidget(window)
+        self._by_workspace[idx].append(window)
+        window.window_closed.connect(self._on_window_closed)
         window.show()
         window.focus_me()
 
+    def _on_window_closed(self, window):
+        for windows in self._by_workspace:
+            if window in windows:
+                windows.remove(window)
+                break
+
     def switch_to(self, index):
         self.current = index % self.count
         self.stack.setCurrentIndex(self.current)
 
     def list_windows(self):
-        out = []
-        for i, ws in enumerate(self.workspaces):
-            items = [ws.layout().itemAt(j).widget() for j in range(ws.layout().count())]
-            out.append((i, items))
-        return out
+        return [(i, list(ws)) for i, ws in enumerate(self._by_workspace)]
 
 # -------------------------
 # Settings Dialog
@@ -716,9 +978,19 @@ class SettingsDialog(QDialog):
             cfg["theme"] = sel.text()
         cfg["autostart"] = [l for l in self.autostart.toPlainText().splitlines() if l.strip()]
         self.shell.config = cfg
-        save_json(CONFIG_FILE, cfg)
+        self.shell.save_config()
         self.accept()
 
+# -------------------------
+# Built-in applications: name -> (window title, content factory)
+# -------------------------
+APP_FACTORIES = {
+    "terminal": ("Terminal", lambda: FancyTerminal(shell_cmd=["/bin/bash"])),
+    "editor": ("Editor", SimpleEditor),
+    "browser": ("Browser", lambda: MiniBrowser("https://duckduckgo.com")),
+    "files": ("Files", SimpleEditor),  # placeholder
+}
+
 # -------------------------
 # Main shell application
 # -------------------------
@@ -729,15 +1001,23 @@ class PyShellApp(QWidget):
         self.theme_manager = ThemeManager()
         self.load_config()
 
+        # pick up external edits of the config file without a restart; the
+        # directory is watched too so the file is re-armed when it reappears
+        self._own_config_stat = None
+        self._config_watcher = QFileSystemWatcher(self)
+        self._config_watcher.addPath(CONFIG_DIR)
+        self._config_watcher.fileChanged.connect(self._on_config_changed)
+        self._config_watcher.directoryChanged.connect(self._on_config_dir_changed)
+        self.watch_config()
+
         # create overlays and content BEFORE showing full-screen to avoid
         # resizeEvent before attributes exist
+        self.apply_theme()
         self.panel = TopPanel(self, self.theme_manager)
-        self.panel.apply_theme()
 
         self.workspace_manager = WorkspaceManager(self, count=WORKSPACE_COUNT)
 
         self.dock = Dock(self, self.theme_manager)
-        self.dock.apply_theme()
 
         self.notifications = NotificationCenter(self)
 
@@ -761,9 +1041,19 @@ class PyShellApp(QWidget):
         self.dock.setParent(self)
         self.notifications.setParent(self)
 
+        # screen size is cached and refreshed only when the screen changes;
+        # resize bursts are coalesced into one reposition per frame
+        screen = QApplication.primaryScreen()
+        self._screen_sz = screen.size()
+        screen.geometryChanged.connect(self._on_screen_changed)
+        self._reposition_timer = QTimer(self)
+        self._reposition_timer.setSingleShot(True)
+        self._reposition_timer.setInterval(16)
+        self._reposition_timer.timeout.connect(self.reposition_overlays)
+
         # show fullscreen AFTER overlays exist
         self.showFullScreen()
-        self.resize(QApplication.primaryScreen().size())
+        self.resize(self._screen_sz)
         self.reposition_overlays()
 
         # shortcuts
@@ -772,89 +1062,137 @@ class PyShellApp(QWidget):
         QShortcut(Qt.ALT + Qt.Key_Return, self).activated.connect(lambda: self.launch_app("terminal"))
         QShortcut(Qt.ALT + Qt.Key_Left, self).activated.connect(lambda: self.switch_workspace(-1))
         QShortcut(Qt.ALT + Qt.Key_Right, self).activated.connect(lambda: self.switch_workspace(1))
+        # one pair of shortcuts closes whichever internal window has focus;
+        # window context keeps them inactive while a dialog or popup is active
+        QShortcut(Qt.CTRL + Qt.Key_W, self).activated.connect(self.close_focused_window)
+        QShortcut(Qt.Key_Escape, self).activated.connect(self.close_focused_window)
+
+        # flush batched log lines periodically
+        self.log_timer = QTimer(self)
+        self.log_timer.timeout.connect(logger.flush)
+        self.log_timer.start(250)
 
         # autostart slightly delayed
         QTimer.singleShot(1000, self.run_autostart)
 
-        # welcome apps after stable start
-        QTimer.singleShot(500, lambda: self.launch_app("browser"))
-        QTimer.singleShot(800, lambda: self.launch_app("editor"))
+        # windows in Alt+Tab order; closed windows are dropped lazily in
+        # cycle_windows, _window_set tracks the ones still open
+        self.windows = deque()
+        self._window_set = set()
 
-        self.windows = []
+    def close_focused_window(self):
+        if QApplication.activeModalWidget() is not None or QApplication.activePopupWidget() is not None:
+            return
+        w = QApplication.focusWidget()
+        while w is not None and not isinstance(w, InternalWindow):
+            if w.isWindow():
+                return
+            w = w.parentWidget()
+        if w is not None:
+            w.on_close()
 
     def reposition_overlays(self):
         if not (hasattr(self, "panel") and hasattr(self, "dock") and hasattr(self, "notifications")):
             return
-        screen_sz = QApplication.primaryScreen().size()
+        screen_sz = self._screen_sz
         self.panel.setGeometry(0, 0, screen_sz.width(), PANEL_HEIGHT)
         self.dock.setGeometry(8, PANEL_HEIGHT + 8, DOCK_WIDTH, screen_sz.height() - PANEL_HEIGHT - 16)
         self.notifications.setGeometry(screen_sz.width() - 340, PANEL_HEIGHT + 8, 320, 400)
 
     def resizeEvent(self, ev):
         super().resizeEvent(ev)
-        if hasattr(self, "panel") and hasattr(self, "dock") and hasattr(self, "notifications"):
-            self.reposition_overlays()
+        if hasattr(self, "_reposition_timer"):
+            self._reposition_timer.start()
+
+    def _on_screen_changed(self, geom):
+        self._screen_sz = geom.size()
+        self.reposition_overlays()
 
     def load_config(self):
-        cfg = load_json(CONFIG_FILE, default={}) or {}
+        self._apply_config(load_json(CONFIG_FILE, default={}) or {})
+
+    def _apply_config(self, cfg):
         cfg.setdefault("theme", "dark")
         cfg.setdefault("autostart", [])
         cfg.setdefault("shortcuts", {})
         self.config = cfg
         self.theme_manager.set_theme(cfg.get("theme", "dark"))
 
+    def watch_config(self):
+        # save_json replaces the file, which drops it from the watcher
+        if os.path.exists(CONFIG_FILE) and CONFIG_FILE not in self._config_watcher.files():
+            self._config_watcher.addPath(CONFIG_FILE)
+
+    def save_config(self):
+        ok = save_json(CONFIG_FILE, self.config)
+        # remember what our own save left on disk so its change event is ignored
+        self._own_config_stat = self._config_stat()
+        self.watch_config()
+        return ok
+
+    def _config_stat(self):
+        try:
+            st = os.stat(CONFIG_FILE)
+        except OSError:
+            return None
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    def _on_config_changed(self, path):
+        self.watch_config()
+        self._reload_config()
+
+    def _on_config_dir_changed(self, path):
+        if CONFIG_FILE not in self._config_watcher.files() and os.path.exists(CONFIG_FILE):
+            self.watch_config()
+            self._reload_config()
+
+    def _reload_config(self):
+        st = self._config_stat()
+        if st is None or st == self._own_config_stat:
+            return
+        cfg = load_json(CONFIG_FILE)
+        if not isinstance(cfg, dict):
+            # deleted or half-written; keep the current config until it is valid
+            return
+        self._apply_config(cfg)
+        self.apply_theme()
+        logger.info("Config reloaded")
+
     def launch_app(self, name):
-        name = name.lower()
         try:
-            if name == "terminal":
-                t = FancyTerminal(shell_cmd=["/bin/bash"])
-                win = InternalWindow("Terminal", t, parent=self.workspace_manager.workspaces[self.workspace_manager.current])
-                win.window_closed.connect(self.on_window_closed)
-                self.workspace_manager.add_window(win)
-                self.windows.append(win)
-                return win
-            elif name == "editor":
-                ed = SimpleEditor()
-                win = InternalWindow("Editor", ed, parent=self.workspace_manager.workspaces[self.workspace_manager.current])
-                win.window_closed.connect(self.on_window_closed)
-                self.workspace_manager.add_window(win)
-                self.windows.append(win)
-                return win
-            elif name == "browser":
-                br = MiniBrowser("https://duckduckgo.com")
-                win = InternalWindow("Browser", br, parent=self.workspace_manager.workspaces[self.workspace_manager.current])
-                win.window_closed.connect(self.on_window_closed)
-                self.workspace_manager.add_window(win)
-                self.windows.append(win)
-                return win
-            elif name == "files":
-                fm = SimpleEditor()  # placeholder
-                win = InternalWindow("Files", fm, parent=self.workspace_manager.workspaces[self.workspace_manager.current])
-                win.window_closed.connect(self.on_window_closed)
-                self.workspace_manager.add_window(win)
-                self.windows.append(win)
-                return win
-            else:
+            title, factory = APP_FACTORIES.get(name.lower(), (None, None))
+            if factory is None:
                 # attempt to launch external program detached
-                subprocess.Popen([name])
+                self.spawn(name)
                 return None
+            win = InternalWindow(title, factory(), parent=self.workspace_manager.workspaces[self.workspace_manager.current])
+            win.window_closed.connect(self.on_window_closed)
+            self.workspace_manager.add_window(win)
+            self.windows.append(win)
+            self._window_set.add(win)
+            return win
         except Exception as e:
             logger.error("launch_app failed:", e)
             self.notifications.push("Launch failed", str(e))
             return None
 
     def on_window_closed(self, win):
-        try:
-            if win in self.windows:
-                self.windows.remove(win)
-        except Exception:
-            pass
+        self._window_set.discard(win)
+        if self.windows and self.windows[-1] is win:
+            self.windows.pop()
+        elif self.windows and self.windows[0] is win:
+            self.windows.popleft()
+        # compact once closed windows make up more than half of the deque
+        if len(self.windows) > 2 * len(self._window_set):
+            self.windows = deque(w for w in self.windows if w in self._window_set)
 
     def cycle_windows(self):
+        while self.windows and self.windows[0] not in self._window_set:
+            self.windows.popleft()
         if not self.windows:
             return
-        w = self.windows.pop(0)
-        self.windows.append(w)
+        w = self.windows[0]
+        self.windows.rotate(-1)
         try:
             w.raise_()
             w.focus_me()
@@ -870,23 +1208,43 @@ class PyShellApp(QWidget):
         dlg = SettingsDialog(self)
         if dlg.exec_():
             self.theme_manager.set_theme(self.config.get("theme", "dark"))
-            self.panel.apply_theme()
-            self.dock.apply_theme()
+            self.apply_theme()
+
+    def apply_theme(self):
+        QApplication.instance().setStyleSheet(self.theme_manager.stylesheet)
 
     def run_autostart(self):
         for cmd in self.config.get("autostart", []):
+            # built-in apps (e.g. "browser") open as internal windows
+            if cmd.strip().lower() in APP_FACTORIES:
+                self.launch_app(cmd.strip())
+                continue
             try:
-                subprocess.Popen(cmd.split())
+                self.spawn(cmd)
             except Exception as e:
                 logger.warn("autostart failed:", cmd, e)
 
+    def spawn(self, cmd):
+        # QProcess.startDetached returns right away without waiting on the child
+        argv = shlex.split(cmd)
+        if not argv:
+            return False
+        ok = QProcess.startDetached(argv[0], argv[1:])
+        if not ok:
+            logger.error("spawn failed:", cmd)
+            self.notifications.push("Launch failed", cmd)
+        return ok
+
     def quit(self):
+        logger.close()
         QApplication.quit()
 
 # -------------------------
 # Entrypoint
 # -------------------------
 def main():
+    # lets QtWebEngine be imported after the QApplication exists
+    QApplication.setAttribute(Qt.AA_ShareOpenGLContexts)
     app = QApplication(sys.argv)
     # gracefully handle ctrl+c
     signal.signal(signal.SIGINT, lambda *args: QApplication.quit())